@@ -38,18 +38,50 @@ from __future__ import annotations
 
 import inspect
 import asyncio
+import functools
+import heapq
 import json
 import os
-import random
+import re
 import threading
-from dataclasses import dataclass, asdict
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 import aiohttp
+import msgspec
 from dotenv import load_dotenv
-from flask import Flask, Response, redirect, render_template_string, request, session, url_for
+
+try:
+    import orjson
+except ImportError:  # stdlib json keeps the bot portable without the wheel
+    orjson = None
+
+try:
+    from lxml import etree as _etree  # C-backed, preferred
+except ImportError:
+    from xml.etree import ElementTree as _etree  # type: ignore[no-redef]
+from flask import Flask, Response, redirect, request, url_for
+from markupsafe import escape as _ms_escape
+from itsdangerous import BadData, URLSafeTimedSerializer
+
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+try:
+    from waitress import serve as waitress_serve
+except ImportError:
+    waitress_serve = None
+
+try:
+    import uvicorn
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError:
+    uvicorn = None
+    WsgiToAsgi = None
 
 from aiogram import Bot, Dispatcher, F, Router
 from aiogram.client.default import DefaultBotProperties
@@ -125,11 +157,31 @@ EN = {
 }
 
 
+# Short UI labels reused across handlers; looked up as STRINGS[lang][key]
+# to skip an i18n() call per label on the hot message path.
+STRINGS = {
+    "ua": {
+        "MENU_PROMPT": "Меню 👇",
+        "LANG_CHOOSE": "Оберіть мову:",
+        "CANCELED": "Скасовано ✅",
+        "UNAVAILABLE": "дані недоступні",
+        "NEWS_DOWN": "❌ Новини тимчасово недоступні.",
+    },
+    "en": {
+        "MENU_PROMPT": "Menu 👇",
+        "LANG_CHOOSE": "Choose language:",
+        "CANCELED": "Canceled ✅",
+        "UNAVAILABLE": "unavailable",
+        "NEWS_DOWN": "❌ News temporarily unavailable.",
+    },
+}
+
+
 def tbtn(lang: str, key: str) -> str:
     return EN[key] if lang == "en" else UA[key]
 
 
-def menu_texts_all() -> set[str]:
+def _build_menu_texts() -> frozenset[str]:
     base = set(UA.values()) | set(EN.values())
     base |= {
         "Конвертер",
@@ -157,10 +209,46 @@ def menu_texts_all() -> set[str]:
         "menu",
         "Меню",
     }
-    return base
+    return frozenset(base)
+
+
+_MENU_TEXTS = _build_menu_texts()
+_CANCEL_WORDS = frozenset({"cancel", "відміна", "назад", "menu", "меню"})
+
+
+def menu_texts_all() -> frozenset[str]:
+    return _MENU_TEXTS
+
+
+def _build_menu_actions() -> Dict[str, str]:
+    # Every localized button label (plus the bare aliases) → canonical menu key,
+    # so handlers resolve the action with one dict lookup.
+    actions: Dict[str, str] = {}
+    for d in (UA, EN):
+        for key, label in d.items():
+            actions[label] = key
+    aliases = {
+        "CONVERT": ("Конвертер", "Converter"),
+        "P2P": ("P2P", "P2P sellers"),
+        "ALERTS": ("Нагадування", "Alerts", "Reminders"),
+        "ADVISOR": ("Радник", "Advisor"),
+        "FX": ("Валютний ринок", "FX Market"),
+        "ANALYTICS": ("Аналітика ринку", "Market Analytics"),
+        "EXCH": ("Моніторинг бірж", "Exchange Monitor"),
+        "NEWS": ("Новини", "News"),
+        "HELP": ("Допомога", "Help"),
+        "LANG": ("Мова", "Language", "🌐 Мова", "🌐 Language"),
+    }
+    for key, labels in aliases.items():
+        for label in labels:
+            actions[label] = key
+    return actions
 
 
-def main_menu(lang: str) -> ReplyKeyboardMarkup:
+MENU_ACTION = _build_menu_actions()
+
+
+def _build_main_menu(lang: str) -> ReplyKeyboardMarkup:
     rows = [
         [KeyboardButton(text=tbtn(lang, "CONVERT")), KeyboardButton(text=tbtn(lang, "P2P"))],
         [KeyboardButton(text=tbtn(lang, "ALERTS")), KeyboardButton(text=tbtn(lang, "ADVISOR"))],
@@ -171,6 +259,14 @@ def main_menu(lang: str) -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=rows, resize_keyboard=True)
 
 
+# The keyboards are immutable per language — build both once at import time.
+_MAIN_MENUS = {"ua": _build_main_menu("ua"), "en": _build_main_menu("en")}
+
+
+def main_menu(lang: str) -> ReplyKeyboardMarkup:
+    return _MAIN_MENUS["en" if lang == "en" else "ua"]
+
+
 LANG_MENU = ReplyKeyboardMarkup(
     keyboard=[[KeyboardButton(text="Українська 🇺🇦"), KeyboardButton(text="English 🇬🇧")]],
     resize_keyboard=True,
@@ -194,6 +290,8 @@ def _safe_read_json(path: Path, default: Any) -> Any:
     try:
         if not path.exists():
             return default
+        if orjson is not None:
+            return orjson.loads(path.read_bytes())
         return json.loads(path.read_text(encoding="utf-8"))
     except Exception:
         return default
@@ -202,18 +300,59 @@ def _safe_read_json(path: Path, default: Any) -> Any:
 def _safe_write_json(path: Path, data: Any) -> None:
     try:
         path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        if orjson is not None:
+            blob = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        else:
+            blob = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+        # Write to a sibling temp file and rename — a crash mid-write can't
+        # leave a truncated JSON file behind.
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_bytes(blob)
+        os.replace(tmp, path)
     except Exception:
         pass
 
 
+# get_lang/is_accepted run on every inbound update, so keep both maps in memory
+# and push writes to a background task instead of hitting disk per message.
+_LANG_CACHE: Optional[Dict[str, str]] = None
+_ACCEPTED_CACHE: Optional[Dict[str, bool]] = None
+_WRITE_QUEUE: "asyncio.Queue[Tuple[Path, Any]]" = asyncio.Queue()
+
+
+def _queue_write(path: Path, data: Any) -> None:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        _safe_write_json(path, data)  # no loop yet (startup) — write inline
+        return
+    _WRITE_QUEUE.put_nowait((path, data))
+
+
+async def storage_writer() -> None:
+    while True:
+        path, data = await _WRITE_QUEUE.get()
+        pending: Dict[Path, Any] = {path: data}
+        await asyncio.sleep(0.25)  # coalesce bursts into one write per file
+        while not _WRITE_QUEUE.empty():
+            p, d = _WRITE_QUEUE.get_nowait()
+            pending[p] = d
+        for p, d in pending.items():
+            _safe_write_json(p, d)
+
+
 def load_accepted() -> Dict[str, bool]:
-    data = _safe_read_json(ACCEPTED_FILE, {})
-    return data if isinstance(data, dict) else {}
+    global _ACCEPTED_CACHE
+    if _ACCEPTED_CACHE is None:
+        data = _safe_read_json(ACCEPTED_FILE, {})
+        _ACCEPTED_CACHE = data if isinstance(data, dict) else {}
+    return _ACCEPTED_CACHE
 
 
 def save_accepted(m: Dict[str, bool]) -> None:
-    _safe_write_json(ACCEPTED_FILE, m)
+    global _ACCEPTED_CACHE
+    _ACCEPTED_CACHE = m
+    _queue_write(ACCEPTED_FILE, m)
 
 
 def is_accepted(user_id: int) -> bool:
@@ -227,12 +366,17 @@ def set_accepted(user_id: int, val: bool = True) -> None:
 
 
 def load_lang_map() -> Dict[str, str]:
-    data = _safe_read_json(LANG_FILE, {})
-    return data if isinstance(data, dict) else {}
+    global _LANG_CACHE
+    if _LANG_CACHE is None:
+        data = _safe_read_json(LANG_FILE, {})
+        _LANG_CACHE = data if isinstance(data, dict) else {}
+    return _LANG_CACHE
 
 
 def save_lang_map(m: Dict[str, str]) -> None:
-    _safe_write_json(LANG_FILE, m)
+    global _LANG_CACHE
+    _LANG_CACHE = m
+    _queue_write(LANG_FILE, m)
 
 
 def get_lang(user_id: int) -> str:
@@ -247,16 +391,75 @@ def set_lang(user_id: int, lang: str) -> None:
     save_lang_map(m)
 
 
+# Alerts are re-read every 10s by the checker and scanned per user in the
+# handlers; cache the parsed list keyed by file mtime and index it once.
+_ALERTS_CACHE: Dict[str, Any] = {"mtime": -1.0, "items": [], "by_user": {}, "active_symbols": frozenset()}
+
+
+def _index_alerts(items: List[Dict[str, Any]]) -> None:
+    by_user: Dict[int, List[int]] = {}
+    active: set = set()
+    for i, a in enumerate(items):
+        by_user.setdefault(int(a.get("user_id", 0)), []).append(i)
+        if a.get("active"):
+            sym = str(a.get("symbol") or "").upper()
+            if sym:
+                active.add(sym)
+    _ALERTS_CACHE["by_user"] = by_user
+    _ALERTS_CACHE["active_symbols"] = frozenset(active)
+
+
 def load_alerts() -> List[Dict[str, Any]]:
+    mtime = ALERTS_FILE.stat().st_mtime if ALERTS_FILE.exists() else 0.0
+    if mtime == _ALERTS_CACHE["mtime"]:
+        return _ALERTS_CACHE["items"]
     data = _safe_read_json(ALERTS_FILE, [])
-    return data if isinstance(data, list) else []
+    items = data if isinstance(data, list) else []
+    _ALERTS_CACHE["mtime"] = mtime
+    _ALERTS_CACHE["items"] = items
+    _index_alerts(items)
+    return items
 
 
 def save_alerts(items: List[Dict[str, Any]]) -> None:
     _safe_write_json(ALERTS_FILE, items)
+    _ALERTS_CACHE["mtime"] = ALERTS_FILE.stat().st_mtime if ALERTS_FILE.exists() else 0.0
+    _ALERTS_CACHE["items"] = items
+    _index_alerts(items)
+
+
+def active_alert_symbols() -> frozenset:
+    load_alerts()  # refresh if the file changed
+    return _ALERTS_CACHE["active_symbols"]
 
 
 # -------------------- HTTP helpers --------------------
+_HTTP: Optional[aiohttp.ClientSession] = None
+
+
+async def get_session() -> aiohttp.ClientSession:
+    # One session per app: keeps the connection pool, keep-alives and DNS cache warm.
+    global _HTTP
+    if _HTTP is None or _HTTP.closed:
+        _HTTP = aiohttp.ClientSession(
+            headers=HTTP_HEADERS,
+            connector=aiohttp.TCPConnector(
+                limit=64,
+                limit_per_host=16,
+                ttl_dns_cache=300,
+                keepalive_timeout=75,
+            ),
+        )
+    return _HTTP
+
+
+async def close_session() -> None:
+    global _HTTP
+    if _HTTP is not None and not _HTTP.closed:
+        await _HTTP.close()
+    _HTTP = None
+
+
 async def fetch_json(
     session: aiohttp.ClientSession,
     url: str,
@@ -294,20 +497,47 @@ COIN_IDS = {
 FX_PAIRS = {"USDUAH", "EURUAH"}  # for alerts
 
 
+CRYPTO_PRICE_TTL_SEC = 30
+_CRYPTO_PRICE_CACHE: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], Tuple[float, Dict[str, Dict[str, float]]]] = {}
+
+
+async def get_crypto_prices(ids: List[str], vs: List[str]) -> Dict[str, Dict[str, float]]:
+    # simple/price takes comma-separated ids/vs_currencies: one round-trip and
+    # one rate-limit token for the whole batch, cached for a short TTL.
+    key = (tuple(sorted(ids)), tuple(sorted(v.lower() for v in vs)))
+    cached = _CRYPTO_PRICE_CACHE.get(key)
+    if cached is not None and time.monotonic() - cached[0] < CRYPTO_PRICE_TTL_SEC:
+        return cached[1]
+    s = await get_session()
+    data = await fetch_json(
+        s,
+        COINGECKO_SIMPLE_PRICE,
+        params={"ids": ",".join(key[0]), "vs_currencies": ",".join(key[1])},
+    )
+    out: Dict[str, Dict[str, float]] = {}
+    if isinstance(data, dict):
+        for cid, row in data.items():
+            if isinstance(row, dict):
+                out[cid] = {k: float(v) for k, v in row.items() if isinstance(v, (int, float))}
+    if out:
+        _CRYPTO_PRICE_CACHE[key] = (time.monotonic(), out)
+    return out
+
+
 async def get_crypto_price(coin_id: str, vs: str = "usd") -> Optional[float]:
-    vs = vs.lower()
-    async with aiohttp.ClientSession(headers=HTTP_HEADERS) as s:
-        data = await fetch_json(s, COINGECKO_SIMPLE_PRICE, params={"ids": coin_id, "vs_currencies": vs})
+    # Fetch every tracked coin in both fiat legs at once — a single user
+    # conversion warms the cache for all the others.
+    data = await get_crypto_prices(list(COIN_IDS.values()), ["usd", "eur"])
     try:
-        return float(data[coin_id][vs])
+        return float(data[coin_id][vs.lower()])
     except Exception:
         return None
 
 
 async def get_crypto_snapshot_usd(ids: List[str]) -> Dict[str, Dict[str, Any]]:
     params = {"vs_currency": "usd", "ids": ",".join(ids), "price_change_percentage": "24h"}
-    async with aiohttp.ClientSession(headers=HTTP_HEADERS) as s:
-        data = await fetch_json(s, COINGECKO_MARKETS, params=params)
+    s = await get_session()
+    data = await fetch_json(s, COINGECKO_MARKETS, params=params)
     out: Dict[str, Dict[str, Any]] = {}
     if isinstance(data, list):
         for item in data:
@@ -321,12 +551,24 @@ async def get_crypto_snapshot_usd(ids: List[str]) -> Dict[str, Dict[str, Any]]:
     return out
 
 
+NBU_TODAY_TTL_SEC = 600
+_NBU_CACHE: Dict[str, Tuple[float, Dict[str, float]]] = {}  # "YYYYMMDD" -> (fetched_at, rates)
+
+
 async def get_nbu_rates(date: Optional[datetime] = None) -> Dict[str, float]:
+    key = (date or datetime.utcnow()).strftime("%Y%m%d")
+    today_key = datetime.utcnow().strftime("%Y%m%d")
+    cached = _NBU_CACHE.get(key)
+    if cached is not None:
+        # Past dates never change; today's table is refreshed every 10 minutes.
+        if key != today_key or time.time() - cached[0] < NBU_TODAY_TTL_SEC:
+            return cached[1]
+
     params = {"json": ""}
     if date is not None:
         params["date"] = date.strftime("%Y%m%d")
-    async with aiohttp.ClientSession(headers=HTTP_HEADERS) as s:
-        data = await fetch_json(s, NBU_EXCHANGE, params=params)
+    s = await get_session()
+    data = await fetch_json(s, NBU_EXCHANGE, params=params)
     rates: Dict[str, float] = {}
     if isinstance(data, list):
         for row in data:
@@ -337,6 +579,8 @@ async def get_nbu_rates(date: Optional[datetime] = None) -> Dict[str, float]:
                     rates[cc] = rate
             except Exception:
                 continue
+    if rates:
+        _NBU_CACHE[key] = (time.time(), rates)
     return rates
 
 
@@ -346,33 +590,48 @@ async def get_nbu_rate(code: str) -> Optional[float]:
     return rates.get(code)
 
 
+_NBU_HISTORY_SEM = asyncio.Semaphore(8)  # politeness cap for parallel NBU day fetches
+
+
 async def get_nbu_rate_history(code: str, days: int = 7) -> List[Tuple[str, float]]:
     code = code.upper()
+
+    async def one_day(d: datetime) -> Dict[str, float]:
+        async with _NBU_HISTORY_SEM:
+            return await get_nbu_rates(d)
+
+    dates = [datetime.utcnow() - timedelta(days=i) for i in range(days - 1, -1, -1)]
+    results = await asyncio.gather(*(one_day(d) for d in dates), return_exceptions=True)
+
     out: List[Tuple[str, float]] = []
-    for i in range(days - 1, -1, -1):
-        d = datetime.utcnow() - timedelta(days=i)
-        try:
-            rates = await get_nbu_rates(d)
-            if code in rates:
-                out.append((d.strftime("%m-%d"), float(rates[code])))
-        except Exception:
+    for d, rates in zip(dates, results):
+        if isinstance(rates, Exception) or code not in rates:
             continue
-        await asyncio.sleep(0.05)
+        out.append((d.strftime("%m-%d"), float(rates[code])))
     return out
 
 
+def _fmt_num(x: float, spec: str = "_.6f") -> str:
+    # Underscore grouping swapped to spaces — replace() runs over the short
+    # number string only, not the whole assembled message line.
+    return format(x, spec).replace("_", " ")
+
+
 def sparkline(values: List[float]) -> str:
     if not values:
         return ""
     blocks = "▁▂▃▄▅▆▇█"
-    mn, mx = min(values), max(values)
-    if mx - mn < 1e-9:
+    mn = mx = values[0]
+    for v in values[1:]:
+        if v < mn:
+            mn = v
+        elif v > mx:
+            mx = v
+    span = mx - mn
+    if span < 1e-9:
         return blocks[0] * len(values)
-    res = []
-    for v in values:
-        idx = int((v - mn) / (mx - mn) * (len(blocks) - 1))
-        res.append(blocks[idx])
-    return "".join(res)
+    scale = (len(blocks) - 1) / span
+    return "".join(blocks[int((v - mn) * scale)] for v in values)
 
 
 # -------------------- Converter --------------------
@@ -405,8 +664,7 @@ async def convert(amount: float, src: str, dst: str) -> Tuple[float, str]:
 
     # Cross: USD <-> EUR via NBU
     if src in {"USD", "EUR"} and dst in {"USD", "EUR"} and src != dst:
-        r_src = await get_nbu_rate(src)
-        r_dst = await get_nbu_rate(dst)
+        r_src, r_dst = await asyncio.gather(get_nbu_rate(src), get_nbu_rate(dst))
         if not r_src or not r_dst:
             raise RuntimeError("NBU cross missing")
         return (amount * r_src) / r_dst, f"NBU cross ({src}->{dst})"
@@ -429,16 +687,15 @@ async def convert(amount: float, src: str, dst: str) -> Tuple[float, str]:
     # Crypto -> UAH via USD + NBU
     if src in COIN_IDS and dst == "UAH":
         coin_id = COIN_IDS[src]
-        price_usd = await get_crypto_price(coin_id, "usd")
-        usd_uah = await get_nbu_rate("USD")
+        # CoinGecko and NBU are independent hosts — query both at once.
+        price_usd, usd_uah = await asyncio.gather(get_crypto_price(coin_id, "usd"), get_nbu_rate("USD"))
         if price_usd is None or usd_uah is None:
             raise RuntimeError("CG/NBU missing")
         return amount * price_usd * usd_uah, "CoinGecko (→USD) + NBU USD/UAH"
 
     if src == "UAH" and dst in COIN_IDS:
         coin_id = COIN_IDS[dst]
-        price_usd = await get_crypto_price(coin_id, "usd")
-        usd_uah = await get_nbu_rate("USD")
+        price_usd, usd_uah = await asyncio.gather(get_crypto_price(coin_id, "usd"), get_nbu_rate("USD"))
         if price_usd is None or usd_uah is None or price_usd == 0:
             raise RuntimeError("CG/NBU missing")
         usd_amt = amount / usd_uah
@@ -447,10 +704,15 @@ async def convert(amount: float, src: str, dst: str) -> Tuple[float, str]:
     raise RuntimeError("pair not supported")
 
 
+# Split on whitespace or a standalone "to"/"в" connector in one compiled pass;
+# the old chained .replace also mangled words merely containing "to".
+_CONV_SPLIT = re.compile(r"\s+|\bto\b|\bв\b", re.IGNORECASE)
+
+
 def parse_convert_input(text: str) -> Optional[Tuple[float, str, str]]:
     if not text:
         return None
-    parts = text.strip().replace("to", " ").replace("в", " ").split()
+    parts = [p for p in _CONV_SPLIT.split(text.strip()) if p]
     if len(parts) == 2:
         return 1.0, parts[0], parts[1]
     if len(parts) >= 3:
@@ -462,6 +724,45 @@ def parse_convert_input(text: str) -> Optional[Tuple[float, str, str]]:
     return None
 
 
+# -------------------- Builder cache + single-flight --------------------
+# If many users hit the same section inside a TTL window, only the first
+# caller does the network work; everyone else awaits the same future.
+_INFLIGHT: Dict[str, "asyncio.Future[str]"] = {}
+_BUILD_CACHE: Dict[str, Tuple[float, str]] = {}
+
+
+async def _single_flight(key: str, builder) -> str:
+    fut = _INFLIGHT.get(key)
+    if fut is not None:
+        return await fut
+    fut = asyncio.get_event_loop().create_future()
+    _INFLIGHT[key] = fut
+    try:
+        result = await builder()
+        fut.set_result(result)
+        return result
+    except Exception as e:
+        fut.set_exception(e)
+        fut.exception()  # mark retrieved in case nobody else is waiting
+        raise
+    finally:
+        del _INFLIGHT[key]
+
+
+async def _cached_build(key: str, ttl: int, builder) -> str:
+    now = time.monotonic()
+    cached = _BUILD_CACHE.get(key)
+    if cached is not None and now - cached[0] <= ttl:
+        return cached[1]
+
+    async def run() -> str:
+        text = await builder()
+        _BUILD_CACHE[key] = (time.monotonic(), text)
+        return text
+
+    return await _single_flight(key, run)
+
+
 # -------------------- Advisor (cache + fallback) --------------------
 ADVISOR_CACHE_TTL_SEC = 60
 ADVISOR_CACHE_MAX_STALE_SEC = 24 * 3600
@@ -477,11 +778,11 @@ async def build_advisor_text(lang: str) -> str:
         p = it.get("price")
         ch = it.get("ch24")
         if not isinstance(p, (int, float)) or not isinstance(ch, (int, float)):
-            return f"{sym}: " + i18n(lang, "дані недоступні", "unavailable")
+            return f"{sym}: " + STRINGS[lang]["UNAVAILABLE"]
         mood_ua = "флет" if -3 <= ch <= 3 else ("імпульс ↑" if ch > 3 else "просадка ↓")
         mood_en = "flat" if -3 <= ch <= 3 else ("impulse ↑" if ch > 3 else "dip ↓")
         mood = mood_en if lang == "en" else mood_ua
-        return f"{sym}: <b>${p:,.2f}</b> | 24h: <b>{ch:+.2f}%</b> | <b>{mood}</b>".replace(",", " ")
+        return f"{sym}: <b>${_fmt_num(p, '_.2f')}</b> | 24h: <b>{ch:+.2f}%</b> | <b>{mood}</b>"
 
     rows = "\n".join(
         [
@@ -513,7 +814,9 @@ async def build_advisor_text(lang: str) -> str:
 
 
 async def get_advisor_text_cached(lang: str) -> str:
-    now = datetime.utcnow().timestamp()
+    # TTLs compare against time.monotonic(): no datetime construction per call
+    # and immune to wall-clock jumps.
+    now = time.monotonic()
     key = "en" if lang == "en" else "ua"
     cached_ts = float(_advisor_cache[key].get("ts", 0.0) or 0.0)
     cached_text = str(_advisor_cache[key].get("text", "") or "")
@@ -522,7 +825,7 @@ async def get_advisor_text_cached(lang: str) -> str:
         return cached_text
 
     try:
-        fresh = await asyncio.wait_for(build_advisor_text(lang), timeout=16)
+        fresh = await asyncio.wait_for(_single_flight(f"advisor:{key}", lambda: build_advisor_text(lang)), timeout=16)
         _advisor_cache[key] = {"ts": now, "text": fresh}
         return fresh
     except Exception:
@@ -538,9 +841,13 @@ async def get_advisor_text_cached(lang: str) -> str:
 
 # -------------------- FX Market + Analytics --------------------
 async def build_fx_text(lang: str) -> str:
-    usd = await get_nbu_rate("USD")
-    eur = await get_nbu_rate("EUR")
-    hist_usd = await get_nbu_rate_history("USD", days=7)
+    # One NBU table fetch covers both USD and EUR; run it alongside the history.
+    rates, hist_usd = await asyncio.gather(
+        get_nbu_rates(),
+        get_nbu_rate_history("USD", days=7),
+    )
+    usd = rates.get("USD")
+    eur = rates.get("EUR")
 
     trend_ua = "📈 USD/UAH за 7 днів: дані недоступні"
     trend_en = "📈 USD/UAH 7 days: unavailable"
@@ -564,12 +871,14 @@ async def build_fx_text(lang: str) -> str:
 
 
 async def build_analytics_text(lang: str) -> str:
-    hist_usd = await get_nbu_rate_history("USD", days=14)
-    hist_eur = await get_nbu_rate_history("EUR", days=14)
+    hist_usd, hist_eur = await asyncio.gather(
+        get_nbu_rate_history("USD", days=14),
+        get_nbu_rate_history("EUR", days=14),
+    )
 
     def block(title: str, hist: List[Tuple[str, float]]) -> str:
         if len(hist) < 2:
-            return f"{title}: " + i18n(lang, "дані недоступні", "unavailable")
+            return f"{title}: " + STRINGS[lang]["UNAVAILABLE"]
         labels = [d for d, _ in hist]
         vals = [v for _, v in hist]
         sp = sparkline(vals)
@@ -600,12 +909,7 @@ async def build_analytics_text(lang: str) -> str:
 
 
 # -------------------- Exchange Monitor --------------------
-async def build_exchange_monitor_text(lang: str) -> str:
-    async with aiohttp.ClientSession(headers=HTTP_HEADERS) as s:
-        data = await fetch_json(s, COINGECKO_TICKERS, params={"include_exchange_logo": "false"}, timeout=22)
-
-    tickers = data.get("tickers", []) if isinstance(data, dict) else []
-    rows = []
+def _iter_btc_rows(tickers: List[Dict[str, Any]]):
     for t in tickers:
         try:
             market = t.get("market", {}).get("name") or "?"
@@ -619,19 +923,25 @@ async def build_exchange_monitor_text(lang: str) -> str:
                 continue
             if not isinstance(last, (int, float)):
                 continue
-            rows.append((float(vol) if isinstance(vol, (int, float)) else 0.0, market, target, float(last)))
+            yield (float(vol) if isinstance(vol, (int, float)) else 0.0, market, target, float(last))
         except Exception:
             continue
 
-    rows.sort(key=lambda x: x[0], reverse=True)
-    rows = rows[:15]
+
+async def build_exchange_monitor_text(lang: str) -> str:
+    s = await get_session()
+    data = await fetch_json(s, COINGECKO_TICKERS, params={"include_exchange_logo": "false"}, timeout=22)
+
+    tickers = data.get("tickers", []) if isinstance(data, dict) else []
+    # Top-15 by volume via a bounded heap — no full list build + sort.
+    rows = heapq.nlargest(15, _iter_btc_rows(tickers), key=lambda x: x[0])
 
     if not rows:
         return i18n(lang, "❌ Дані бірж тимчасово недоступні.", "❌ Exchange data temporarily unavailable.")
 
     lines = []
     for i, (_, market, target, last) in enumerate(rows, 1):
-        lines.append(f"{i:>2}. <b>{market}</b> — BTC/{target}: <b>{last:,.2f}</b>".replace(",", " "))
+        lines.append(f"{i:>2}. <b>{market}</b> — BTC/{target}: <b>{_fmt_num(last, '_.2f')}</b>")
 
     sym_map_ua = (
         "\n\n<b>Карта символів</b>:\n"
@@ -666,39 +976,71 @@ RSS_FX = [
 ]
 
 
+def _item_title(el: Any) -> str:
+    # Works for both RSS <item> and (namespaced) Atom <entry>.
+    for child in el:
+        if str(child.tag).rsplit("}", 1)[-1] == "title":
+            return (child.text or "").strip()
+    return ""
+
+
+RSS_MAX_BYTES = 1_048_576  # never pull more than 1MB of feed for a few titles
+
+
 async def fetch_rss_titles(url: str, limit: int = 5) -> List[str]:
-    async with aiohttp.ClientSession(
-        headers={"User-Agent": "CryptoBot/1.0", "Accept": "application/rss+xml,application/xml,text/xml,*/*"}
-    ) as s:
-        async with s.get(url, timeout=18) as r:
-            r.raise_for_status()
-            xml = await r.text()
-    titles = []
-    for part in xml.split("<title>")[1:]:
-        t = part.split("</title>")[0].strip()
-        if not t:
-            continue
-        if len(titles) == 0:
-            titles.append(t)
-            continue
-        titles.append(t)
-        if len(titles) >= limit + 1:
-            break
-    return titles[1 : limit + 1] if len(titles) > 1 else titles[:limit]
+    s = await get_session()
+    titles: List[str] = []
+    async with s.get(
+        url,
+        timeout=18,
+        headers={"Accept": "application/rss+xml,application/xml,text/xml,*/*"},
+    ) as r:
+        r.raise_for_status()
+        # Feed the parser chunk by chunk and abandon the rest of the body as
+        # soon as enough items have completed — feeds can be >500KB while we
+        # only want the first few titles.
+        parser = _etree.XMLPullParser(events=("end",))
+        read = 0
+        try:
+            async for chunk in r.content.iter_chunked(8192):
+                read += len(chunk)
+                parser.feed(chunk)
+                for _, el in parser.read_events():
+                    if str(el.tag).rsplit("}", 1)[-1] not in {"item", "entry"}:
+                        continue
+                    t = _item_title(el)
+                    if t:
+                        titles.append(t)
+                    el.clear()
+                    if len(titles) >= limit:
+                        return titles
+                if read >= RSS_MAX_BYTES:
+                    break
+        except Exception:
+            pass  # malformed tail after enough items is fine; return what we have
+    return titles[:limit]
 
 
 async def build_news_text(lang: str) -> str:
-    urls = RSS_CRYPTO + RSS_FX
-    random.shuffle(urls)
+    # Fire every feed at once and take whichever answer first; a slow feed
+    # no longer delays the reply past the overall timeout.
+    tasks = [asyncio.create_task(fetch_rss_titles(u, limit=4)) for u in RSS_CRYPTO + RSS_FX]
     items: List[str] = []
-    for url in urls[:3]:
-        try:
-            titles = await fetch_rss_titles(url, limit=4)
-            items.extend(titles)
-        except Exception:
-            continue
+    try:
+        for fut in asyncio.as_completed(tasks, timeout=10):
+            try:
+                items.extend(await fut)
+            except Exception:
+                continue
+            if len(items) >= 10:
+                break
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        for t in tasks:
+            t.cancel()
     if not items:
-        return i18n(lang, "❌ Новини тимчасово недоступні.", "❌ News temporarily unavailable.")
+        return STRINGS[lang]["NEWS_DOWN"]
 
     head = "📰 <b>Новини</b>\n" if lang != "en" else "📰 <b>News</b>\n"
     lines = [f"• {t}" for t in items[:10]]
@@ -706,44 +1048,43 @@ async def build_news_text(lang: str) -> str:
 
 
 # -------------------- P2P sellers --------------------
-@dataclass
-class P2PSeller:
-    name: str
-    currency: str
-    rate: str
-    limit: str
-    contact: str
+class P2PSeller(msgspec.Struct):
+    # msgspec decodes/encodes the JSON file straight into these structs,
+    # skipping the dict -> dataclass -> dict round-trip.
+    name: str = ""
+    currency: str = ""
+    rate: str = ""
+    limit: str = ""
+    contact: str = ""
+
+
+_P2P_CACHE: Tuple[float, List[P2PSeller]] = (0.0, [])  # (file mtime, parsed sellers)
 
 
 def load_p2p_sellers() -> List[P2PSeller]:
+    global _P2P_CACHE
     if not P2P_FILE.exists():
         return []
+    mtime = P2P_FILE.stat().st_mtime
+    if mtime == _P2P_CACHE[0]:
+        return _P2P_CACHE[1]
     try:
-        data = json.loads(P2P_FILE.read_text(encoding="utf-8"))
-        out = []
-        if isinstance(data, list):
-            for row in data:
-                if not isinstance(row, dict):
-                    continue
-                out.append(
-                    P2PSeller(
-                        name=str(row.get("name", "")),
-                        currency=str(row.get("currency", "")),
-                        rate=str(row.get("rate", "")),
-                        limit=str(row.get("limit", "")),
-                        contact=str(row.get("contact", "")),
-                    )
-                )
-        return out
+        out = msgspec.json.decode(P2P_FILE.read_bytes(), type=List[P2PSeller])
     except Exception:
-        return []
+        out = []
+    # Cache the parse failure too — otherwise a corrupt file is re-read on
+    # every request until it changes.
+    _P2P_CACHE = (mtime, out)
+    return out
 
 
 def save_p2p_sellers(items: List[P2PSeller]) -> None:
-    data = [asdict(x) for x in items]
-    P2P_FILE.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    global _P2P_CACHE
+    P2P_FILE.write_bytes(msgspec.json.format(msgspec.json.encode(items), indent=2))
+    _P2P_CACHE = (P2P_FILE.stat().st_mtime, items)
 
 
+@functools.lru_cache(maxsize=4)
 def p2p_inline_kb(lang: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         inline_keyboard=[
@@ -759,7 +1100,14 @@ def p2p_inline_kb(lang: str) -> InlineKeyboardMarkup:
 
 # -------------------- Dashboard (Flask) --------------------
 app = Flask(__name__)
-app.secret_key = DASHBOARD_SECRET
+if Compress is not None:
+    Compress(app)  # gzip the Bootstrap-heavy HTML (~4-5x fewer bytes on the wire)
+
+# The dashboard only needs one bit ("logged in"), so skip Flask's session
+# machinery and its TaggedJSONSerializer: sign a tiny token ourselves.
+_AUTH_COOKIE = "a"
+_AUTH_MAX_AGE = 86400
+_AUTH_SER = URLSafeTimedSerializer(DASHBOARD_SECRET)
 
 BASE_HTML = """
 <!doctype html>
@@ -810,9 +1158,16 @@ BASE_HTML = """
 </html>
 """
 
+# Compile the layout once — render_template_string re-lexes and re-compiles
+# the Jinja source on every call.
+_BASE_TMPL = app.jinja_env.from_string(BASE_HTML)
+
 
 def _is_logged_in() -> bool:
-    return bool(session.get("logged_in", False))
+    try:
+        return _AUTH_SER.loads(request.cookies.get(_AUTH_COOKIE, ""), max_age=_AUTH_MAX_AGE) == "1"
+    except BadData:
+        return False
 
 
 @app.get("/")
@@ -827,7 +1182,7 @@ def dash_home() -> Response:
       <a class="btn btn-outline-secondary" href="/logout">Logout</a>
     </div>
     """
-    return render_template_string(BASE_HTML, title="Home", body=body, logged_in=True)
+    return _BASE_TMPL.render(title="Home", body=body, logged_in=True)
 
 
 @app.get("/login")
@@ -851,7 +1206,7 @@ def dash_login() -> str:
       </div>
     </div>
     """
-    return render_template_string(BASE_HTML, title="Login", body=body, logged_in=_is_logged_in())
+    return _BASE_TMPL.render(title="Login", body=body, logged_in=_is_logged_in())
 
 
 @app.post("/login")
@@ -859,15 +1214,33 @@ def dash_login_post() -> Response:
     user = (request.form.get("user") or "").strip()
     pw = (request.form.get("pass") or "").strip()
     if user == DASHBOARD_USER and pw == DASHBOARD_PASS:
-        session["logged_in"] = True
-        return redirect(url_for("dash_home"))
+        resp = redirect(url_for("dash_home"))
+        resp.set_cookie(
+            _AUTH_COOKIE,
+            _AUTH_SER.dumps("1"),
+            httponly=True,
+            samesite="Lax",
+            max_age=_AUTH_MAX_AGE,
+        )
+        return resp
     return redirect(url_for("dash_login"))
 
 
 @app.get("/logout")
 def dash_logout() -> Response:
-    session.clear()
-    return redirect(url_for("dash_login"))
+    resp = redirect(url_for("dash_login"))
+    resp.delete_cookie(_AUTH_COOKIE)
+    return resp
+
+
+@functools.lru_cache(maxsize=512)
+def _esc(s: str) -> str:
+    # Seller fields are admin-entered free text and go straight into HTML
+    # (dashboard) and HTML-parse-mode Telegram messages. P2PSeller is a
+    # msgspec.Struct with fixed slots, so the escaped form can't be cached
+    # on the object — cache per unique string instead; the seller list is
+    # small and mostly static, so reloads hit the cache.
+    return str(_ms_escape(s))
 
 
 def _seller_form_html(seller: Optional[P2PSeller]) -> str:
@@ -877,11 +1250,11 @@ def _seller_form_html(seller: Optional[P2PSeller]) -> str:
       <div class="row g-3">
         <div class="col-12 col-md-6">
           <label class="form-label">Name</label>
-          <input class="form-control" name="name" value="{s.name}" required />
+          <input class="form-control" name="name" value="{_esc(s.name)}" required />
         </div>
         <div class="col-12 col-md-6">
           <label class="form-label">Contact</label>
-          <input class="form-control" name="contact" value="{s.contact}" placeholder="@telegram або телефон" />
+          <input class="form-control" name="contact" value="{_esc(s.contact)}" placeholder="@telegram або телефон" />
         </div>
 
         <div class="col-12 col-md-4">
@@ -894,11 +1267,11 @@ def _seller_form_html(seller: Optional[P2PSeller]) -> str:
         </div>
         <div class="col-12 col-md-4">
           <label class="form-label">Rate</label>
-          <input class="form-control" name="rate" value="{s.rate}" placeholder="e.g. 39.20" />
+          <input class="form-control" name="rate" value="{_esc(s.rate)}" placeholder="e.g. 39.20" />
         </div>
         <div class="col-12 col-md-4">
           <label class="form-label">Limit</label>
-          <input class="form-control" name="limit" value="{s.limit}" placeholder="e.g. 10k–200k" />
+          <input class="form-control" name="limit" value="{_esc(s.limit)}" placeholder="e.g. 10k–200k" />
         </div>
 
         <div class="col-12 d-flex gap-2 mt-2">
@@ -910,34 +1283,14 @@ def _seller_form_html(seller: Optional[P2PSeller]) -> str:
     """
 
 
-@app.get("/p2p")
-def dash_p2p() -> Response:
-    if not _is_logged_in():
-        return redirect(url_for("dash_login"))
-
-    sellers = load_p2p_sellers()
-    rows = ""
-    for i, s in enumerate(sellers):
-        rows += f"""
-        <tr>
-          <td class="text-muted">{i+1}</td>
-          <td><b>{s.name}</b></td>
-          <td><span class="badge bg-secondary">{s.currency}</span></td>
-          <td>{s.rate}</td>
-          <td>{s.limit}</td>
-          <td>{s.contact}</td>
-          <td class="text-end">
-            <a class="btn btn-sm btn-outline-primary" href="/p2p/edit/{i}">Edit</a>
-            <a class="btn btn-sm btn-outline-danger" href="/p2p/delete/{i}" onclick="return confirm('Delete this seller?')">Delete</a>
-          </td>
-        </tr>
-        """
-
-    body = f"""
+# Whole P2P list as one compiled Jinja template — the row loop runs inside
+# Jinja's generated code and autoescaping covers the seller fields, instead
+# of a Python-side format/join pass per request.
+P2P_PAGE_HTML = """
     <div class="d-flex justify-content-between align-items-center mb-3">
       <div>
         <h3 class="mb-0">P2P sellers</h3>
-        <div class="muted">Total: <b>{len(sellers)}</b></div>
+        <div class="muted">Total: <b>{{ sellers|length }}</b></div>
       </div>
       <a class="btn btn-success" href="/p2p/new">+ Add seller</a>
     </div>
@@ -956,12 +1309,36 @@ def dash_p2p() -> Response:
           </tr>
         </thead>
         <tbody>
-          {rows if rows else '<tr><td colspan="7" class="text-center text-muted py-4">No sellers yet</td></tr>'}
+          {% for s in sellers %}
+          <tr>
+            <td class="text-muted">{{ loop.index }}</td>
+            <td><b>{{ s.name }}</b></td>
+            <td><span class="badge bg-secondary">{{ s.currency }}</span></td>
+            <td>{{ s.rate }}</td>
+            <td>{{ s.limit }}</td>
+            <td>{{ s.contact }}</td>
+            <td class="text-end">
+              <a class="btn btn-sm btn-outline-primary" href="/p2p/edit/{{ loop.index0 }}">Edit</a>
+              <a class="btn btn-sm btn-outline-danger" href="/p2p/delete/{{ loop.index0 }}" onclick="return confirm('Delete this seller?')">Delete</a>
+            </td>
+          </tr>
+          {% else %}
+          <tr><td colspan="7" class="text-center text-muted py-4">No sellers yet</td></tr>
+          {% endfor %}
         </tbody>
       </table>
     </div>
     """
-    return render_template_string(BASE_HTML, title="P2P", body=body, logged_in=True)
+_P2P_PAGE_TMPL = app.jinja_env.from_string(P2P_PAGE_HTML)
+
+
+@app.get("/p2p")
+def dash_p2p() -> Response:
+    if not _is_logged_in():
+        return redirect(url_for("dash_login"))
+
+    sellers = load_p2p_sellers()
+    return _BASE_TMPL.render(title="P2P", body=_P2P_PAGE_TMPL.render(sellers=sellers), logged_in=True)
 
 
 @app.get("/p2p/new")
@@ -969,7 +1346,7 @@ def dash_p2p_new() -> Response:
     if not _is_logged_in():
         return redirect(url_for("dash_login"))
     body = "<h3>Add seller</h3>" + _seller_form_html(None)
-    return render_template_string(BASE_HTML, title="Add", body=body, logged_in=True)
+    return _BASE_TMPL.render(title="Add", body=body, logged_in=True)
 
 
 @app.post("/p2p/new")
@@ -998,7 +1375,7 @@ def dash_p2p_edit(idx: int) -> Response:
     if idx < 0 or idx >= len(sellers):
         return redirect(url_for("dash_p2p"))
     body = "<h3>Edit seller</h3>" + _seller_form_html(sellers[idx])
-    return render_template_string(BASE_HTML, title="Edit", body=body, logged_in=True)
+    return _BASE_TMPL.render(title="Edit", body=body, logged_in=True)
 
 
 @app.post("/p2p/edit/<int:idx>")
@@ -1031,13 +1408,17 @@ def dash_p2p_delete(idx: int) -> Response:
 
 
 def run_dashboard() -> None:
-    app.run(host=HOST, port=PORT, debug=False)
+    if waitress_serve is not None:
+        waitress_serve(app, host=HOST, port=PORT, threads=8, _quiet=True)
+    else:
+        app.run(host=HOST, port=PORT, debug=False)  # dev fallback
 
 
 # -------------------- Telegram bot (aiogram v3) --------------------
 router = Router()
 dp = Dispatcher()
 dp.include_router(router)
+dp.shutdown.register(close_session)
 
 bot = Bot(BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
 
@@ -1051,26 +1432,28 @@ class AlertState(StatesGroup):
 
 
 def require_accept(func):
-    sig = inspect.signature(func)
-    allowed = set(sig.parameters.keys())
+    allowed = frozenset(inspect.signature(func).parameters)
 
     async def wrapper(message: Message, state: FSMContext, *args, **kwargs):
         lang = get_lang(message.from_user.id)
 
         if not is_accepted(message.from_user.id):
             await message.answer(i18n(lang, DISCLAIMER_UA, DISCLAIMER_EN), reply_markup=disclaimer_kb(lang))
-            await message.answer(i18n(lang, "Оберіть мову:", "Choose language:"), reply_markup=LANG_MENU)
+            await message.answer(STRINGS[lang]["LANG_CHOOSE"], reply_markup=LANG_MENU)
             return
 
         # ✅ aiogram може передавати dispatcher, bot, event_from_user тощо
         # ми пропускаємо тільки те, що реально є в сигнатурі функції
-        filtered_kwargs = {k: v for k, v in kwargs.items() if k in allowed}
+        if not kwargs:
+            return await func(message, state, *args)
+        filtered_kwargs = {k: kwargs[k] for k in kwargs.keys() & allowed}
 
         return await func(message, state, *args, **filtered_kwargs)
 
     return wrapper
 
 
+@functools.lru_cache(maxsize=4)
 def disclaimer_kb(lang: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         inline_keyboard=[
@@ -1099,15 +1482,15 @@ async def disclaimer_decline(call: CallbackQuery) -> None:
 
 
 @router.message(Command("start"))
-print(f"[DEBUG] /start from {message.from_user.id} text={message.text!r}")
 async def cmd_start(message: Message, state: FSMContext) -> None:
+    print(f"[DEBUG] /start from {message.from_user.id} text={message.text!r}")
     await state.clear()
     lang = get_lang(message.from_user.id)
     if not is_accepted(message.from_user.id):
         await message.answer(i18n(lang, DISCLAIMER_UA, DISCLAIMER_EN), reply_markup=disclaimer_kb(lang))
-        await message.answer(i18n(lang, "Оберіть мову:", "Choose language:"), reply_markup=LANG_MENU)
+        await message.answer(STRINGS[lang]["LANG_CHOOSE"], reply_markup=LANG_MENU)
         return
-    await message.answer(i18n(lang, "Меню 👇", "Menu 👇"), reply_markup=main_menu(lang))
+    await message.answer(STRINGS[lang]["MENU_PROMPT"], reply_markup=main_menu(lang))
 
 
 @router.message(Command("help"))
@@ -1129,42 +1512,81 @@ async def lang_pick(message: Message, state: FSMContext) -> None:
     await message.answer(i18n(lang, "✅ Мову змінено.", "✅ Language changed."), reply_markup=main_menu(lang))
 
 
+# Static help/FAQ bodies — built once at import, help_text is a plain lookup.
+_HELP_EN = (
+    "ℹ️ <b>Help / FAQ</b>\n\n"
+    "💱 <b>Converter</b>\n"
+    "Examples:\n"
+    "• <code>100 UAH USD</code>\n"
+    "• <code>200 USD EUR</code>\n"
+    "• <code>0.01 BTC UAH</code>\n"
+    "• <code>BTC UAH</code> (amount=1)\n\n"
+    "⏰ <b>Alerts</b>\n"
+    "Crypto in USD: <code>BTC below 65000</code>\n"
+    "FX NBU: <code>USDUAH above 42</code>\n\n"
+    "🧠 <b>Advisor</b>\n"
+    "Quick snapshot (price + 24h %). Cached fallback if API is down.\n\n"
+    "💹 <b>FX Market</b> — official NBU rates.\n"
+    "📊 <b>Market Analytics</b> — 14-day dynamics (sparkline).\n"
+    "💻 <b>Exchange Monitor</b> — BTC quotes across ~15 exchanges.\n"
+)
+_HELP_UA = (
+    "ℹ️ <b>Допомога / FAQ</b>\n\n"
+    "💱 <b>Конвертер</b>\n"
+    "Приклади:\n"
+    "• <code>100 UAH USD</code>\n"
+    "• <code>200 USD EUR</code>\n"
+    "• <code>0.01 BTC UAH</code>\n"
+    "• <code>BTC UAH</code> (сума=1)\n\n"
+    "⏰ <b>Нагадування</b>\n"
+    "Crypto в USD: <code>BTC below 65000</code>\n"
+    "FX НБУ: <code>USDUAH above 42</code>\n\n"
+    "🧠 <b>Радник</b>\n"
+    "Короткий огляд (ціна + 24h %). Є кеш+fallback.\n\n"
+    "💹 <b>Валютний ринок</b> — офіційні курси НБУ.\n"
+    "📊 <b>Аналітика ринку</b> — динаміка 14 днів (спарклайн).\n"
+    "💻 <b>Моніторинг бірж</b> — BTC котирування ~15 бірж.\n"
+)
+
+_CONVERTER_PROMPT_UA = (
+    "💱 <b>Конвертер</b>\n"
+    "Введіть запит у форматі:\n"
+    "• <code>0.5 BTC UAH</code>\n"
+    "• <code>100 UAH USD</code>\n"
+    "• <code>200 USD EUR</code>\n"
+    "• <code>BTC UAH</code> (сума = 1)\n\n"
+    "Підтримка пар:\n"
+    "• BTC/ETH/SOL/USDT ↔ USD/EUR (CoinGecko)\n"
+    "• USD/EUR ↔ UAH (НБУ)\n"
+    "• USD ↔ EUR (крос-курс НБУ)\n\n"
+    "Скасування: <code>menu</code>"
+)
+_CONVERTER_PROMPT_EN = (
+    "💱 <b>Converter</b>\n"
+    "Enter query:\n"
+    "• <code>0.5 BTC UAH</code>\n"
+    "• <code>100 UAH USD</code>\n"
+    "• <code>200 USD EUR</code>\n"
+    "• <code>BTC UAH</code> (amount = 1)\n\n"
+    "Supported pairs:\n"
+    "• BTC/ETH/SOL/USDT ↔ USD/EUR (CoinGecko)\n"
+    "• USD/EUR ↔ UAH (NBU)\n"
+    "• USD ↔ EUR (NBU cross-rate)\n\n"
+    "Cancel: <code>menu</code>"
+)
+
+_CONVERT_FORMAT_UA = "Формат: <code>100 UAH USD</code> або <code>0.5 BTC UAH</code> або <code>BTC UAH</code> (сума=1)"
+_CONVERT_FORMAT_EN = "Format: <code>100 UAH USD</code> or <code>0.5 BTC UAH</code> or <code>BTC UAH</code> (amount=1)"
+_CONVERT_FAIL_UA = (
+    "❌ Не вдалося конвертувати. Спробуй: <code>100 UAH USD</code> або <code>200 USD EUR</code> або <code>0.01 BTC UAH</code>"
+)
+_CONVERT_FAIL_EN = (
+    "❌ Conversion failed. Try: <code>100 UAH USD</code> or <code>200 USD EUR</code> or <code>0.01 BTC UAH</code>"
+)
+
+
 def help_text(lang: str) -> str:
-    if lang == "en":
-        return (
-            "ℹ️ <b>Help / FAQ</b>\n\n"
-            "💱 <b>Converter</b>\n"
-            "Examples:\n"
-            "• <code>100 UAH USD</code>\n"
-            "• <code>200 USD EUR</code>\n"
-            "• <code>0.01 BTC UAH</code>\n"
-            "• <code>BTC UAH</code> (amount=1)\n\n"
-            "⏰ <b>Alerts</b>\n"
-            "Crypto in USD: <code>BTC below 65000</code>\n"
-            "FX NBU: <code>USDUAH above 42</code>\n\n"
-            "🧠 <b>Advisor</b>\n"
-            "Quick snapshot (price + 24h %). Cached fallback if API is down.\n\n"
-            "💹 <b>FX Market</b> — official NBU rates.\n"
-            "📊 <b>Market Analytics</b> — 14-day dynamics (sparkline).\n"
-            "💻 <b>Exchange Monitor</b> — BTC quotes across ~15 exchanges.\n"
-        )
-    return (
-        "ℹ️ <b>Допомога / FAQ</b>\n\n"
-        "💱 <b>Конвертер</b>\n"
-        "Приклади:\n"
-        "• <code>100 UAH USD</code>\n"
-        "• <code>200 USD EUR</code>\n"
-        "• <code>0.01 BTC UAH</code>\n"
-        "• <code>BTC UAH</code> (сума=1)\n\n"
-        "⏰ <b>Нагадування</b>\n"
-        "Crypto в USD: <code>BTC below 65000</code>\n"
-        "FX НБУ: <code>USDUAH above 42</code>\n\n"
-        "🧠 <b>Радник</b>\n"
-        "Короткий огляд (ціна + 24h %). Є кеш+fallback.\n\n"
-        "💹 <b>Валютний ринок</b> — офіційні курси НБУ.\n"
-        "📊 <b>Аналітика ринку</b> — динаміка 14 днів (спарклайн).\n"
-        "💻 <b>Моніторинг бірж</b> — BTC котирування ~15 бірж.\n"
-    )
+    return _HELP_EN if lang == "en" else _HELP_UA
 
 
 # -------------------- Converter FSM handler --------------------
@@ -1179,20 +1601,14 @@ async def converter_input(message: Message, state: FSMContext) -> None:
         await router_menu(message, state)
         return
 
-    if q.lower() in {"cancel", "відміна", "назад", "menu", "меню"}:
+    if q.lower() in _CANCEL_WORDS:
         await state.clear()
-        await message.answer(i18n(lang, "Скасовано ✅", "Canceled ✅"), reply_markup=main_menu(lang))
+        await message.answer(STRINGS[lang]["CANCELED"], reply_markup=main_menu(lang))
         return
 
     parsed = parse_convert_input(q)
     if not parsed:
-        await message.answer(
-            i18n(
-                lang,
-                "Формат: <code>100 UAH USD</code> або <code>0.5 BTC UAH</code> або <code>BTC UAH</code> (сума=1)",
-                "Format: <code>100 UAH USD</code> or <code>0.5 BTC UAH</code> or <code>BTC UAH</code> (amount=1)",
-            )
-        )
+        await message.answer(_CONVERT_FORMAT_EN if lang == "en" else _CONVERT_FORMAT_UA)
         return
 
     amount, src, dst = parsed
@@ -1200,17 +1616,13 @@ async def converter_input(message: Message, state: FSMContext) -> None:
         result, rate_info = await asyncio.wait_for(convert(float(amount), str(src), str(dst)), timeout=14)
         await message.answer(
             i18n(lang, "🧮 <b>Результат</b>\n", "🧮 <b>Result</b>\n")
-            + f"{amount:g} {_norm_ccy(src)} ≈ <b>{result:,.6f}</b> {_norm_ccy(dst)}\n".replace(",", " ")
+            + f"{amount:g} {_norm_ccy(src)} ≈ <b>{_fmt_num(result)}</b> {_norm_ccy(dst)}\n"
             + f"<i>Source: {rate_info}</i>",
             reply_markup=main_menu(lang),
         )
     except Exception:
         await message.answer(
-            i18n(
-                lang,
-                "❌ Не вдалося конвертувати. Спробуй: <code>100 UAH USD</code> або <code>200 USD EUR</code> або <code>0.01 BTC UAH</code>",
-                "❌ Conversion failed. Try: <code>100 UAH USD</code> or <code>200 USD EUR</code> or <code>0.01 BTC UAH</code>",
-            ),
+            _CONVERT_FAIL_EN if lang == "en" else _CONVERT_FAIL_UA,
             reply_markup=main_menu(lang),
         )
     finally:
@@ -1264,7 +1676,7 @@ def add_alert(user_id: int, symbol: str, direction: str, target: float) -> None:
             "direction": direction.upper(),
             "target": float(target),
             "active": True,
-            "created_at": datetime.utcnow().isoformat(),
+            "created_at": int(time.time()),
         }
     )
     save_alerts(items)
@@ -1272,12 +1684,12 @@ def add_alert(user_id: int, symbol: str, direction: str, target: float) -> None:
 
 def list_alerts(user_id: int) -> List[Dict[str, Any]]:
     items = load_alerts()
-    return [a for a in items if int(a.get("user_id", 0)) == int(user_id)]
+    return [items[i] for i in _ALERTS_CACHE["by_user"].get(int(user_id), ())]
 
 
 def deactivate_alert(user_id: int, idx: int) -> bool:
     items = load_alerts()
-    user_items = [i for i, a in enumerate(items) if int(a.get("user_id", 0)) == int(user_id)]
+    user_items = _ALERTS_CACHE["by_user"].get(int(user_id), ())
     if idx < 0 or idx >= len(user_items):
         return False
     real_i = user_items[idx]
@@ -1286,6 +1698,7 @@ def deactivate_alert(user_id: int, idx: int) -> bool:
     return True
 
 
+@functools.lru_cache(maxsize=4)
 def alerts_kb(lang: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         inline_keyboard=[
@@ -1296,33 +1709,35 @@ def alerts_kb(lang: str) -> InlineKeyboardMarkup:
     )
 
 
+_ALERT_HOW_UA = (
+    "ℹ️ <b>Як працюють алерти</b>\n\n"
+    "Формат:\n"
+    "• <code>BTC below 65000</code>\n"
+    "• <code>USDUAH above 42</code>\n\n"
+    "Підтримка:\n"
+    "• BTC/ETH/SOL/USDT — ціна в USD (CoinGecko)\n"
+    "• USDUAH/EURUAH — офіційний курс НБУ\n\n"
+    "Коли ціна перетне рівень — ти отримаєш повідомлення, а алерт автоматично вимкнеться."
+)
+_ALERT_HOW_EN = (
+    "ℹ️ <b>How alerts work</b>\n\n"
+    "Format:\n"
+    "• <code>BTC below 65000</code>\n"
+    "• <code>USDUAH above 42</code>\n\n"
+    "Supported:\n"
+    "• BTC/ETH/SOL/USDT — USD price (CoinGecko)\n"
+    "• USDUAH/EURUAH — official NBU rate\n\n"
+    "When price crosses target — you get a message and the alert auto-disables."
+)
+
+
 @router.callback_query(F.data == "alert:how")
 @require_accept
 async def alert_how(call: CallbackQuery, state: FSMContext) -> None:
     await state.clear()
     lang = get_lang(call.from_user.id)
     await call.answer()
-    await call.message.answer(
-        i18n(
-            lang,
-            "ℹ️ <b>Як працюють алерти</b>\n\n"
-            "Формат:\n"
-            "• <code>BTC below 65000</code>\n"
-            "• <code>USDUAH above 42</code>\n\n"
-            "Підтримка:\n"
-            "• BTC/ETH/SOL/USDT — ціна в USD (CoinGecko)\n"
-            "• USDUAH/EURUAH — офіційний курс НБУ\n\n"
-            "Коли ціна перетне рівень — ти отримаєш повідомлення, а алерт автоматично вимкнеться.",
-            "ℹ️ <b>How alerts work</b>\n\n"
-            "Format:\n"
-            "• <code>BTC below 65000</code>\n"
-            "• <code>USDUAH above 42</code>\n\n"
-            "Supported:\n"
-            "• BTC/ETH/SOL/USDT — USD price (CoinGecko)\n"
-            "• USDUAH/EURUAH — official NBU rate\n\n"
-            "When price crosses target — you get a message and the alert auto-disables.",
-        )
-    )
+    await call.message.answer(_ALERT_HOW_EN if lang == "en" else _ALERT_HOW_UA)
 
 
 @router.callback_query(F.data == "alert:add")
@@ -1370,9 +1785,9 @@ async def alert_list(call: CallbackQuery, state: FSMContext) -> None:
 async def alert_input(message: Message, state: FSMContext) -> None:
     lang = get_lang(message.from_user.id)
     q = (message.text or "").strip()
-    if q.lower() in {"menu", "меню", "cancel", "відміна", "назад"} or q in menu_texts_all():
+    if q.lower() in _CANCEL_WORDS or q in menu_texts_all():
         await state.clear()
-        await message.answer(i18n(lang, "Скасовано ✅", "Canceled ✅"), reply_markup=main_menu(lang))
+        await message.answer(STRINGS[lang]["CANCELED"], reply_markup=main_menu(lang))
         return
 
     parsed = parse_alert_input(q)
@@ -1392,16 +1807,19 @@ async def alert_input(message: Message, state: FSMContext) -> None:
     await message.answer(i18n(lang, "✅ Алерт додано.", "✅ Alert added."), reply_markup=main_menu(lang))
 
 
-@router.message(F.text.regexp(r"^(off|OFF)\s+\d+$"))
+OFF_RE = re.compile(r"^off\s+(\d+)$", re.IGNORECASE)
+
+
+@router.message(F.text.regexp(OFF_RE))
 @require_accept
 async def alert_off(message: Message, state: FSMContext) -> None:
     await state.clear()
     lang = get_lang(message.from_user.id)
-    try:
-        idx = int((message.text or "").split()[1]) - 1
-    except Exception:
+    m = OFF_RE.match(message.text or "")
+    if not m:
         await message.answer(i18n(lang, "Формат: <code>off 1</code>", "Format: <code>off 1</code>"), reply_markup=main_menu(lang))
         return
+    idx = int(m.group(1)) - 1
     ok = deactivate_alert(message.from_user.id, idx)
     await message.answer(
         i18n(lang, "✅ Вимкнено." if ok else "❌ Не знайдено.", "✅ Disabled." if ok else "❌ Not found."),
@@ -1410,138 +1828,134 @@ async def alert_off(message: Message, state: FSMContext) -> None:
 
 
 # -------------------- Menu router --------------------
-@router.message(F.text)
-print(f"[DEBUG] text handler from {message.from_user.id} text={message.text!r}")
-@require_accept
-async def router_menu(message: Message, state: FSMContext) -> None:
-    lang = get_lang(message.from_user.id)
-    text = (message.text or "").strip()
-
-    if await state.get_state() is not None and text in menu_texts_all():
-        await state.clear()
+async def _menu_lang(message: Message, state: FSMContext, lang: str) -> None:
+    await message.answer(STRINGS[lang]["LANG_CHOOSE"], reply_markup=LANG_MENU)
 
-    if text in {UA["LANG"], EN["LANG"], "🌐 Language", "🌐 Мова", "Language", "Мова"}:
-        await message.answer(i18n(lang, "Оберіть мову:", "Choose language:"), reply_markup=LANG_MENU)
-        return
 
-    if text in {UA["HELP"], EN["HELP"], "Help", "Допомога"}:
-        await message.answer(help_text(lang), reply_markup=main_menu(lang))
-        return
+async def _menu_help(message: Message, state: FSMContext, lang: str) -> None:
+    await message.answer(help_text(lang), reply_markup=main_menu(lang))
 
-    if text in {UA["P2P"], EN["P2P"], "P2P"}:
-        sellers = load_p2p_sellers()
-        if not sellers:
-            await message.answer(
-                i18n(lang, "Поки немає продавців. Додайте в Dashboard.", "No sellers yet. Add via Dashboard."),
-                reply_markup=p2p_inline_kb(lang),
-            )
-            await message.answer(i18n(lang, "Меню 👇", "Menu 👇"), reply_markup=main_menu(lang))
-            return
-        lines = [i18n(lang, "🤝 <b>P2P продавці</b>", "🤝 <b>P2P sellers</b>")]
-        for i, s in enumerate(sellers[:30], 1):
-            lines.append(f"{i}. <b>{s.name}</b> — {s.currency} — rate: {s.rate} — limit: {s.limit} — {s.contact}")
-        if len(sellers) > 30:
-            lines.append(i18n(lang, f"... і ще {len(sellers)-30} (див. Dashboard)", f"... plus {len(sellers)-30} (see Dashboard)"))
-        await message.answer("\n".join(lines), reply_markup=p2p_inline_kb(lang))
-        await message.answer(i18n(lang, "Меню 👇", "Menu 👇"), reply_markup=main_menu(lang))
-        return
 
-    if text in {UA["CONVERT"], EN["CONVERT"], "Конвертер", "Converter"}:
-        await state.set_state(ConverterState.waiting_text)
+async def _menu_p2p(message: Message, state: FSMContext, lang: str) -> None:
+    sellers = load_p2p_sellers()
+    if not sellers:
         await message.answer(
-            i18n(
-                lang,
-                "💱 <b>Конвертер</b>\n"
-                "Введіть запит у форматі:\n"
-                "• <code>0.5 BTC UAH</code>\n"
-                "• <code>100 UAH USD</code>\n"
-                "• <code>200 USD EUR</code>\n"
-                "• <code>BTC UAH</code> (сума = 1)\n\n"
-                "Підтримка пар:\n"
-                "• BTC/ETH/SOL/USDT ↔ USD/EUR (CoinGecko)\n"
-                "• USD/EUR ↔ UAH (НБУ)\n"
-                "• USD ↔ EUR (крос-курс НБУ)\n\n"
-                "Скасування: <code>menu</code>",
-                "💱 <b>Converter</b>\n"
-                "Enter query:\n"
-                "• <code>0.5 BTC UAH</code>\n"
-                "• <code>100 UAH USD</code>\n"
-                "• <code>200 USD EUR</code>\n"
-                "• <code>BTC UAH</code> (amount = 1)\n\n"
-                "Supported pairs:\n"
-                "• BTC/ETH/SOL/USDT ↔ USD/EUR (CoinGecko)\n"
-                "• USD/EUR ↔ UAH (NBU)\n"
-                "• USD ↔ EUR (NBU cross-rate)\n\n"
-                "Cancel: <code>menu</code>",
-            ),
-            reply_markup=ReplyKeyboardRemove(),
+            i18n(lang, "Поки немає продавців. Додайте в Dashboard.", "No sellers yet. Add via Dashboard.")
+            + "\n\n" + STRINGS[lang]["MENU_PROMPT"],
+            reply_markup=p2p_inline_kb(lang),
         )
         return
+    lines = [i18n(lang, "🤝 <b>P2P продавці</b>", "🤝 <b>P2P sellers</b>")]
+    for i, s in enumerate(sellers[:30], 1):
+        lines.append(
+            f"{i}. <b>{_esc(s.name)}</b> — {_esc(s.currency)} — rate: {_esc(s.rate)} — limit: {_esc(s.limit)} — {_esc(s.contact)}"
+        )
+    if len(sellers) > 30:
+        lines.append(i18n(lang, f"... і ще {len(sellers)-30} (див. Dashboard)", f"... plus {len(sellers)-30} (see Dashboard)"))
+    lines.append("\n" + STRINGS[lang]["MENU_PROMPT"])
+    await message.answer("\n".join(lines), reply_markup=p2p_inline_kb(lang))
 
-    if text in {UA["ALERTS"], EN["ALERTS"], "Нагадування", "Alerts", "Reminders"}:
-        await state.clear()
+
+async def _menu_convert(message: Message, state: FSMContext, lang: str) -> None:
+    await state.set_state(ConverterState.waiting_text)
+    await message.answer(
+        _CONVERTER_PROMPT_EN if lang == "en" else _CONVERTER_PROMPT_UA,
+        reply_markup=ReplyKeyboardRemove(),
+    )
+
+
+async def _menu_alerts(message: Message, state: FSMContext, lang: str) -> None:
+    await state.clear()
+    await message.answer(
+        i18n(
+            lang,
+            "⏰ <b>Нагадування (алерти)</b>\nСтвори правило: символ + above/below + ціна.\n\nМеню 👇",
+            "⏰ <b>Alerts</b>\nCreate rule: symbol + above/below + price.\n\nMenu 👇",
+        ),
+        reply_markup=alerts_kb(lang),
+    )
+
+
+async def _menu_advisor(message: Message, state: FSMContext, lang: str) -> None:
+    await state.clear()
+    await message.answer(i18n(lang, "⏳ Формую огляд…", "⏳ Building snapshot…"))
+    try:
+        msg = await get_advisor_text_cached(lang)
+        await message.answer(msg, reply_markup=main_menu(lang))
+    except Exception:
         await message.answer(
-            i18n(
-                lang,
-                "⏰ <b>Нагадування (алерти)</b>\nСтвори правило: символ + above/below + ціна.",
-                "⏰ <b>Alerts</b>\nCreate rule: symbol + above/below + price.",
-            ),
-            reply_markup=alerts_kb(lang),
+            i18n(lang, "❌ Дані Радника недоступні. Спробуйте пізніше.", "❌ Advisor data is unavailable. Try later."),
+            reply_markup=main_menu(lang),
         )
-        await message.answer(i18n(lang, "Меню 👇", "Menu 👇"), reply_markup=main_menu(lang))
-        return
 
-    if text in {UA["ADVISOR"], EN["ADVISOR"], "Радник", "Advisor"}:
-        await state.clear()
-        await message.answer(i18n(lang, "⏳ Формую огляд…", "⏳ Building snapshot…"))
-        try:
-            msg = await get_advisor_text_cached(lang)
-            await message.answer(msg, reply_markup=main_menu(lang))
-        except Exception:
-            await message.answer(
-                i18n(lang, "❌ Дані Радника недоступні. Спробуйте пізніше.", "❌ Advisor data is unavailable. Try later."),
-                reply_markup=main_menu(lang),
-            )
-        return
 
-    if text in {UA["FX"], EN["FX"], "FX Market", "Валютний ринок"}:
-        await state.clear()
-        await message.answer(i18n(lang, "⏳ Завантажую курси…", "⏳ Loading rates…"))
-        try:
-            msg = await asyncio.wait_for(build_fx_text(lang), timeout=18)
-            await message.answer(msg, reply_markup=main_menu(lang))
-        except Exception:
-            await message.answer(i18n(lang, "❌ Не вдалося отримати дані НБУ.", "❌ Failed to load NBU rates."), reply_markup=main_menu(lang))
-        return
+async def _menu_fx(message: Message, state: FSMContext, lang: str) -> None:
+    await state.clear()
+    await message.answer(i18n(lang, "⏳ Завантажую курси…", "⏳ Loading rates…"))
+    try:
+        msg = await asyncio.wait_for(_cached_build(f"fx:{lang}", 60, lambda: build_fx_text(lang)), timeout=18)
+        await message.answer(msg, reply_markup=main_menu(lang))
+    except Exception:
+        await message.answer(i18n(lang, "❌ Не вдалося отримати дані НБУ.", "❌ Failed to load NBU rates."), reply_markup=main_menu(lang))
 
-    if text in {UA["ANALYTICS"], EN["ANALYTICS"], "Market Analytics", "Аналітика ринку"}:
-        await state.clear()
-        await message.answer(i18n(lang, "⏳ Формую аналітику…", "⏳ Building analytics…"))
-        try:
-            msg = await asyncio.wait_for(build_analytics_text(lang), timeout=25)
-            await message.answer(msg, reply_markup=main_menu(lang))
-        except Exception:
-            await message.answer(i18n(lang, "❌ Аналітика тимчасово недоступна.", "❌ Analytics temporarily unavailable."), reply_markup=main_menu(lang))
-        return
 
-    if text in {UA["EXCH"], EN["EXCH"], "Exchange Monitor", "Моніторинг бірж"}:
-        await state.clear()
-        await message.answer(i18n(lang, "⏳ Завантажую котирування…", "⏳ Loading quotes…"))
-        try:
-            msg = await asyncio.wait_for(build_exchange_monitor_text(lang), timeout=28)
-            await message.answer(msg, reply_markup=main_menu(lang))
-        except Exception:
-            await message.answer(i18n(lang, "❌ Не вдалося отримати дані бірж.", "❌ Failed to fetch exchange data."), reply_markup=main_menu(lang))
-        return
+async def _menu_analytics(message: Message, state: FSMContext, lang: str) -> None:
+    await state.clear()
+    await message.answer(i18n(lang, "⏳ Формую аналітику…", "⏳ Building analytics…"))
+    try:
+        msg = await asyncio.wait_for(_cached_build(f"analytics:{lang}", 60, lambda: build_analytics_text(lang)), timeout=25)
+        await message.answer(msg, reply_markup=main_menu(lang))
+    except Exception:
+        await message.answer(i18n(lang, "❌ Аналітика тимчасово недоступна.", "❌ Analytics temporarily unavailable."), reply_markup=main_menu(lang))
+
+
+async def _menu_exch(message: Message, state: FSMContext, lang: str) -> None:
+    await state.clear()
+    await message.answer(i18n(lang, "⏳ Завантажую котирування…", "⏳ Loading quotes…"))
+    try:
+        msg = await asyncio.wait_for(_cached_build(f"exchmon:{lang}", 30, lambda: build_exchange_monitor_text(lang)), timeout=28)
+        await message.answer(msg, reply_markup=main_menu(lang))
+    except Exception:
+        await message.answer(i18n(lang, "❌ Не вдалося отримати дані бірж.", "❌ Failed to fetch exchange data."), reply_markup=main_menu(lang))
+
+
+async def _menu_news(message: Message, state: FSMContext, lang: str) -> None:
+    await state.clear()
+    await message.answer(i18n(lang, "⏳ Завантажую новини…", "⏳ Loading news…"))
+    try:
+        msg = await asyncio.wait_for(_cached_build(f"news:{lang}", 60, lambda: build_news_text(lang)), timeout=25)
+        await message.answer(msg, reply_markup=main_menu(lang))
+    except Exception:
+        await message.answer(STRINGS[lang]["NEWS_DOWN"], reply_markup=main_menu(lang))
+
+
+_MENU_DISPATCH = {
+    "LANG": _menu_lang,
+    "HELP": _menu_help,
+    "P2P": _menu_p2p,
+    "CONVERT": _menu_convert,
+    "ALERTS": _menu_alerts,
+    "ADVISOR": _menu_advisor,
+    "FX": _menu_fx,
+    "ANALYTICS": _menu_analytics,
+    "EXCH": _menu_exch,
+    "NEWS": _menu_news,
+}
+
+
+@router.message(F.text)
+@require_accept
+async def router_menu(message: Message, state: FSMContext) -> None:
+    print(f"[DEBUG] text handler from {message.from_user.id} text={message.text!r}")
+    lang = get_lang(message.from_user.id)
+    text = (message.text or "").strip()
 
-    if text in {UA["NEWS"], EN["NEWS"], "News", "Новини"}:
+    if await state.get_state() is not None and text in menu_texts_all():
         await state.clear()
-        await message.answer(i18n(lang, "⏳ Завантажую новини…", "⏳ Loading news…"))
-        try:
-            msg = await asyncio.wait_for(build_news_text(lang), timeout=25)
-            await message.answer(msg, reply_markup=main_menu(lang))
-        except Exception:
-            await message.answer(i18n(lang, "❌ Новини тимчасово недоступні.", "❌ News temporarily unavailable."), reply_markup=main_menu(lang))
+
+    handler = _MENU_DISPATCH.get(MENU_ACTION.get(text, ""))
+    if handler is not None:
+        await handler(message, state, lang)
         return
 
     await message.answer(
@@ -1553,21 +1967,40 @@ async def router_menu(message: Message, state: FSMContext) -> None:
 # -------------------- Background alerts checker --------------------
 async def alerts_checker() -> None:
     await asyncio.sleep(3)
+    # Fired alerts flip active=False on the cached items in place; the file
+    # write is debounced so a burst of market moves doesn't rewrite the JSON
+    # on every tick. Internal mutations (add_alert/deactivate_alert) go
+    # through save_alerts and flush any pending deactivations with them,
+    # since they share the same cached list.
+    dirty = False
+    fired_since_flush = 0
+    last_flush = time.monotonic()
     while True:
         try:
             items = load_alerts()
             changed = False
-            symbols = sorted({a.get("symbol") for a in items if a.get("active")})
+            symbols = active_alert_symbols()
             prices: Dict[str, Optional[float]] = {}
-            for sym in symbols:
-                if not sym:
-                    continue
-                try:
-                    prices[sym] = await get_symbol_price(sym)
-                except Exception:
-                    prices[sym] = None
-                await asyncio.sleep(0.2)
-
+            crypto_syms = [s for s in symbols if s in COIN_IDS]
+            fx_syms = [s for s in symbols if s in FX_PAIRS]
+            if crypto_syms or fx_syms:
+                # One batched CoinGecko call covers every crypto symbol and one
+                # NBU table covers both FX pairs — no per-symbol round-trips.
+                batch, rates = await asyncio.gather(
+                    get_crypto_prices([COIN_IDS[s] for s in crypto_syms], ["usd"]) if crypto_syms else asyncio.sleep(0, {}),
+                    get_nbu_rates() if fx_syms else asyncio.sleep(0, {}),
+                    return_exceptions=True,
+                )
+                if isinstance(batch, Exception):
+                    batch = {}
+                if isinstance(rates, Exception):
+                    rates = {}
+                for s in crypto_syms:
+                    prices[s] = (batch.get(COIN_IDS[s]) or {}).get("usd")
+                for s in fx_syms:
+                    prices[s] = rates.get(s[:3])
+
+            sends = []
             for a in items:
                 if not a.get("active"):
                     continue
@@ -1583,18 +2016,33 @@ async def alerts_checker() -> None:
                     a["active"] = False
                     changed = True
                     lang = get_lang(user_id)
-                    await bot.send_message(
-                        user_id,
-                        i18n(
-                            lang,
-                            f"🔔 <b>Алерт спрацював</b>\n{sym} {direction.lower()} {target}\nПоточна: <b>{cur:.4f}</b>",
-                            f"🔔 <b>Alert triggered</b>\n{sym} {direction.lower()} {target}\nCurrent: <b>{cur:.4f}</b>",
-                        ),
-                        reply_markup=main_menu(lang),
+                    sends.append(
+                        bot.send_message(
+                            user_id,
+                            i18n(
+                                lang,
+                                f"🔔 <b>Алерт спрацював</b>\n{sym} {direction.lower()} {target}\nПоточна: <b>{cur:.4f}</b>",
+                                f"🔔 <b>Alert triggered</b>\n{sym} {direction.lower()} {target}\nCurrent: <b>{cur:.4f}</b>",
+                            ),
+                            reply_markup=main_menu(lang),
+                        )
                     )
 
+            if sends:
+                # Overlap the Telegram round-trips instead of paying one RTT per fire.
+                await asyncio.gather(*sends, return_exceptions=True)
+
             if changed:
+                _index_alerts(items)  # keep active_symbols honest before the flush lands
+                dirty = True
+                fired_since_flush += len(sends)
+
+            now = time.monotonic()
+            if dirty and (now - last_flush > 30 or fired_since_flush > 10):
                 save_alerts(items)
+                dirty = False
+                fired_since_flush = 0
+                last_flush = now
         except Exception:
             pass
 
@@ -1606,9 +2054,16 @@ async def main() -> None:
     if not BOT_TOKEN:
         raise RuntimeError("BOT_TOKEN is missing. Put BOT_TOKEN in .env")
 
-    t = threading.Thread(target=run_dashboard, daemon=True)
-    t.start()
+    if uvicorn is not None and WsgiToAsgi is not None:
+        # Run the dashboard on the bot's own event loop — one loop, no extra
+        # OS thread fighting the handlers for the GIL.
+        config = uvicorn.Config(WsgiToAsgi(app), host=HOST, port=PORT, loop="asyncio", log_level="warning")
+        asyncio.create_task(uvicorn.Server(config).serve())
+    else:
+        t = threading.Thread(target=run_dashboard, daemon=True)
+        t.start()
 
+    asyncio.create_task(storage_writer())
     asyncio.create_task(alerts_checker())
 
     print("[bot] Starting Telegram polling...")
@@ -1616,4 +2071,10 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop
+
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
@@ -1,10 +1,33 @@
+import asyncio
+import heapq
 import os
 import logging
+import time
 from typing import List, Dict, Any
 
 import ccxt.async_support as ccxt
 import aiohttp
-import feedparser
+
+try:
+    # декодування відповіді бірж — основна CPU-вартість fetch_tickers на
+    # мегабайтних JSON-ах; orjson розбирає їх у рази швидше за stdlib
+    import orjson
+    import ccxt.base.exchange as _cbe
+
+    def _orjson_parse_json(http_response):
+        try:
+            return orjson.loads(http_response)
+        except Exception:
+            return None
+
+    _cbe.Exchange.parse_json = staticmethod(_orjson_parse_json)
+except ImportError:
+    pass
+
+try:
+    from lxml import etree as _etree  # швидший парсер, якщо встановлений
+except ImportError:
+    import xml.etree.ElementTree as _etree
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
     ApplicationBuilder,
@@ -31,6 +54,7 @@ RSS_FEEDS = {
     "NewsNow Crypto": "https://www.newsnow.com/us/Business/Cryptocurrencies/rss",
     "Yahoo Crypto": "https://finance.yahoo.com/topic/crypto/rss",
 }
+_RSS_FEED_LIST = tuple(RSS_FEEDS.items())
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -54,54 +78,113 @@ async def close_exchange_clients(clients: Dict[str, ccxt.Exchange]) -> None:
         except Exception:
             pass
 
+# Кеш результатів по біржі: Prices і Analytics діляться одними даними, а
+# швидкі повторні кліки не б'ють у біржу знову (і не ловлять rate limit)
+TICKERS_TTL = 20.0
+_TICKERS_CACHE: Dict[str, tuple] = {}
+
 async def fetch_top_tickers_for_exchange(ex: ccxt.Exchange, per_exchange: int) -> List[Dict[str, Any]]:
+    ex_id = getattr(ex, "id", str(ex))
+    cached = _TICKERS_CACHE.get(ex_id)
+    if cached and time.monotonic() - cached[0] < TICKERS_TTL:
+        return cached[1]
+    result = await _fetch_top_tickers_uncached(ex, per_exchange)
+    if result:
+        _TICKERS_CACHE[ex_id] = (time.monotonic(), result)
+    return result
+
+async def _fetch_fallback_tickers(ex: ccxt.Exchange, per_exchange: int) -> List[Dict[str, Any]]:
+    # фіксований список тягнемо паралельно, але не більше 4 запитів
+    # одночасно — швидше за послідовний цикл і в межах rate limit біржі
+    sem = asyncio.Semaphore(4)
+
+    async def one(sym):
+        async with sem:
+            try:
+                return sym, await ex.fetch_ticker(sym)
+            except Exception:
+                return sym, None
+
+    results = await asyncio.gather(*(one(s) for s in FALLBACK_SYMBOLS[:per_exchange]))
+    out = []
+    for sym, t in results:
+        if t is None:
+            continue
+        out.append({
+            "symbol": sym,
+            "last": t.get("last"),
+            "change_pct": t.get("percentage"),
+            "volume": t.get("quoteVolume") or t.get("baseVolume"),
+        })
+    return out
+
+async def _fetch_top_tickers_uncached(ex: ccxt.Exchange, per_exchange: int) -> List[Dict[str, Any]]:
     try:
-        tickers = await ex.fetch_tickers()
+        if getattr(ex, "id", "") == "kraken":
+            # без фільтра Kraken збирає URL на всі пари — повільно і може
+            # впертись у 414, тому просимо лише відомий список
+            tickers = await ex.fetch_tickers(symbols=FALLBACK_SYMBOLS)
+        else:
+            tickers = await ex.fetch_tickers()
+        # один прохід по тікерах: usdt-відро наповнюється тут же, а кінцівка
+        # рядка перевіряється endswith-ом замість пошуку підрядка
         items = []
+        usdt = []
         for symbol, t in tickers.items():
             try:
-                last = t.get("last")
-                change = t.get("percentage")
-                vol = t.get("quoteVolume") or t.get("baseVolume") or 0
-                items.append({"symbol": symbol, "last": last, "change_pct": change, "volume": vol})
+                entry = {
+                    "symbol": symbol,
+                    "last": t.get("last"),
+                    "change_pct": t.get("percentage"),
+                    "volume": t.get("quoteVolume") or t.get("baseVolume") or 0,
+                }
             except Exception:
                 continue
+            items.append(entry)
+            if symbol.endswith("/USDT"):
+                usdt.append(entry)
 
-        usdt = [x for x in items if "/USDT" in x["symbol"]]
+        # топ-15 через обмежену купу замість повного сортування тисяч тікерів
         if len(usdt) >= per_exchange:
-            candidates = sorted(usdt, key=lambda x: (x["volume"] or 0), reverse=True)[:per_exchange]
+            candidates = heapq.nlargest(per_exchange, usdt, key=lambda x: x["volume"])
         else:
-            candidates = sorted(items, key=lambda x: (x["volume"] or 0), reverse=True)[:per_exchange]
+            candidates = heapq.nlargest(per_exchange, items, key=lambda x: x["volume"])
 
         if not candidates:
             # fallback - try fetching fixed list
-            for sym in FALLBACK_SYMBOLS[:per_exchange]:
-                try:
-                    t = await ex.fetch_ticker(sym)
-                    candidates.append({
-                        "symbol": sym,
-                        "last": t.get("last"),
-                        "change_pct": t.get("percentage"),
-                        "volume": t.get("quoteVolume") or t.get("baseVolume"),
-                    })
-                except Exception:
-                    continue
+            candidates = await _fetch_fallback_tickers(ex, per_exchange)
         return candidates
     except Exception as e:
         logger.warning("Error fetching tickers for %s: %s", getattr(ex, "id", str(ex)), e)
-        results = []
-        for sym in FALLBACK_SYMBOLS[:per_exchange]:
-            try:
-                t = await ex.fetch_ticker(sym)
-                results.append({
-                    "symbol": sym,
-                    "last": t.get("last"),
-                    "change_pct": t.get("percentage"),
-                    "volume": t.get("quoteVolume") or t.get("baseVolume"),
-                })
-            except Exception:
-                continue
-        return results
+        return await _fetch_fallback_tickers(ex, per_exchange)
+
+def chunk_parts(lines, sep, limit=4000):
+    # жадібне пакування у повідомлення до ~4096 символів: нічого не
+    # обрізаємо, довгі звіти їдуть кількома повідомленнями
+    chunks = []
+    buf = []
+    used = 0
+    for line in lines:
+        extra = len(line) + (len(sep) if buf else 0)
+        if buf and used + extra > limit:
+            chunks.append(sep.join(buf))
+            buf = [line]
+            used = len(line)
+        else:
+            buf.append(line)
+            used += extra
+    if buf:
+        chunks.append(sep.join(buf))
+    return chunks or [""]
+
+async def send_chunked(query, context, lines, sep):
+    chunks = chunk_parts(lines, sep)
+    await query.edit_message_text(chunks[0])
+    if len(chunks) > 1:
+        # продовження — паралельно, одна RTT замість серії
+        await asyncio.gather(
+            *(context.bot.send_message(chat_id=query.message.chat_id, text=c) for c in chunks[1:])
+        )
 
 def format_price(p):
     if p is None:
@@ -109,27 +192,26 @@ def format_price(p):
     try:
         if p >= 1:
             return f"{p:,.2f}"
-        else:
-            return f"{p:.8f}".rstrip("0").rstrip(".")
+        # :g сам відкидає хвостові нулі — без пари rstrip-ів на кожен рядок
+        return f"{p:.8g}"
     except Exception:
         return str(p)
 
 def format_change(ch):
-    if ch is None:
-        return "n/a"
-    sign = "+" if ch >= 0 else ""
-    return f"{sign}{ch:.2f}%"
+    # :+.2f ставить знак сам — окрема гілка для "+" не потрібна
+    return "n/a" if ch is None else f"{ch:+.2f}%"
 
 # ------- Telegram handlers -------
+# клавіатура незмінна — будуємо один раз, а не на кожен /start
+_MAIN_MENU = InlineKeyboardMarkup([
+    [InlineKeyboardButton("Ціни (Prices)", callback_data="prices")],
+    [InlineKeyboardButton("Аналітика (Analytics)", callback_data="analytics")],
+    [InlineKeyboardButton("Новини (News)", callback_data="news")],
+    [InlineKeyboardButton("BTC price (команда /price)", callback_data="cmd_price")]
+])
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    keyboard = [
-        [InlineKeyboardButton("Ціни (Prices)", callback_data="prices")],
-        [InlineKeyboardButton("Аналітика (Analytics)", callback_data="analytics")],
-        [InlineKeyboardButton("Новини (News)", callback_data="news")],
-        [InlineKeyboardButton("BTC price (команда /price)", callback_data="cmd_price")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    await update.message.reply_text("Вітаю! Ось меню бота крипто-інформації. Виберіть дію:", reply_markup=reply_markup)
+    await update.message.reply_text("Вітаю! Ось меню бота крипто-інформації. Виберіть дію:", reply_markup=_MAIN_MENU)
 
 async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
@@ -137,22 +219,16 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     data = query.data or ""
     if data == "prices":
         await query.edit_message_text("Завантажую ціни...")
-        await handle_prices(query)
+        await handle_prices(query, context)
     elif data == "analytics":
         await query.edit_message_text("Генерую аналітику...")
-        await handle_analytics(query)
+        await handle_analytics(query, context)
     elif data == "news":
         await query.edit_message_text("Отримую останні новини...")
-        await handle_news(query)
+        await handle_news(query, context)
     elif data == "cmd_price":
-        # викликаємо ту саму логіку, що й команда /price
-        # тут просто повідомлення про очікування, потім виклик
+        # та сама логіка, що й команда /price
         await query.edit_message_text("Отримую поточну ціну BTC/USDT...")
-        # створимо тимчасове повідомлення з ціною
-        # викликаємо price handler-подібно:
-        class Dummy:
-            async def reply_text(self, t): pass
-        # замість складного – просто викликаємо price через контекст команд
         await price_from_exchange_and_reply(update, context)
     else:
         await query.edit_message_text("Невідома дія")
@@ -161,33 +237,53 @@ async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def price(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await price_from_exchange_and_reply(update, context)
 
+PRICE_TTL = 5.0
+
 async def price_from_exchange_and_reply(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        ex = ccxt.binance({"enableRateLimit": True})
-        try:
+        # постійний клієнт з bot_data + коротка пам'ять останньої ціни:
+        # повторні /price у межах TTL не ходять у мережу взагалі
+        bot_data = context.application.bot_data
+        cached = bot_data.get("btc_last")
+        if cached and time.monotonic() - cached[0] < PRICE_TTL:
+            last = cached[1]
+        else:
+            ex = bot_data["exchanges"]["binance"]
             ticker = await ex.fetch_ticker("BTC/USDT")
             last = ticker.get("last")
-            await update.effective_message.reply_text(f"💰 Поточна ціна BTC/USDT: {format_price(last)} $")
-        finally:
-            try:
-                await ex.close()
-            except Exception:
-                pass
+            bot_data["btc_last"] = (time.monotonic(), last)
+        await update.effective_message.reply_text(f"💰 Поточна ціна BTC/USDT: {format_price(last)} $")
     except Exception as e:
         logger.exception("Price fetch error")
         await update.effective_message.reply_text(f"⚠️ Помилка отримання ціни: {e}")
 
+# Один знімок ринку для обох вкладок: Prices і Analytics читають той самий
+# результат gather-а, другий клік у межах TTL не коштує жодного запиту
+SNAPSHOT_TTL = 20.0
+
+async def snapshot(app) -> Dict[str, Any]:
+    cached = app.bot_data.get("snapshot")
+    if cached and time.monotonic() - cached[0] < SNAPSHOT_TTL:
+        return cached[1]
+    clients = app.bot_data["exchanges"]
+    # таймаут на біржу: gather чекає найповільнішого, тож одна зависла біржа
+    # не повинна тягнути за собою всю відповідь
+    tasks = [
+        asyncio.wait_for(fetch_top_tickers_for_exchange(c, PER_EXCHANGE), timeout=8)
+        for c in clients.values()
+    ]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    snap = dict(zip(clients.keys(), results))
+    app.bot_data["snapshot"] = (time.monotonic(), snap)
+    return snap
+
 # Обробник кнопки "Prices" — повертає топ символів по кожній біржі
-async def handle_prices(query):
-    clients = await create_exchange_clients(EXCHANGES)
+async def handle_prices(query, context):
     try:
-        tasks = [fetch_top_tickers_for_exchange(c, PER_EXCHANGE) for c in clients.values()]
-        results = await __import__("asyncio").gather(*tasks, return_exceptions=True)
+        snap = await snapshot(context.application)
 
         parts = []
-        ex_keys = list(clients.keys())
-        for idx, ex_id in enumerate(ex_keys):
-            res = results[idx]
+        for ex_id, res in snap.items():
             if isinstance(res, Exception):
                 parts.append(f"{ex_id.upper()}: error fetching\n")
                 continue
@@ -199,42 +295,40 @@ async def handle_prices(query):
                 lines.append(f"{sym}: {last} ({ch})")
             parts.append("\n".join(lines))
 
-        final = "\n\n".join(parts)
-        if len(final) > 3800:
-            final = final[:3800] + "\n\n...truncated..."
-        await query.edit_message_text(final)
+        await send_chunked(query, context, parts, "\n\n")
     except Exception as e:
         logger.exception("handle_prices error")
         await query.edit_message_text(f"⚠️ Помилка при отриманні цін: {e}")
-    finally:
-        await close_exchange_clients(clients)
 
 # Аналітика (текстова)
-async def handle_analytics(query):
-    clients = await create_exchange_clients(EXCHANGES)
+async def handle_analytics(query, context):
     try:
-        tasks = [fetch_top_tickers_for_exchange(c, PER_EXCHANGE) for c in clients.values()]
-        results = await __import__("asyncio").gather(*tasks, return_exceptions=True)
+        snap = await snapshot(context.application)
 
-        aggregate = {}
-        ex_names = list(clients.keys())
-        for ex_idx, res in enumerate(results):
-            ex_id = ex_names[ex_idx]
+        # один прохід: по символу накопичуємо [сума обсягів, сума змін,
+        # кількість бірж, перша ціна] без проміжних списків записів
+        agg = {}
+        for res in snap.values():
             if isinstance(res, Exception):
                 continue
             for t in res:
                 sym = t.get("symbol")
-                entry = {"exchange": ex_id, "last": t.get("last"), "change_pct": t.get("change_pct"), "volume": t.get("volume")}
-                aggregate.setdefault(sym, []).append(entry)
+                vol = t.get("volume") or 0
+                ch = t.get("change_pct") or 0
+                e = agg.get(sym)
+                if e is None:
+                    agg[sym] = [vol, ch, 1, t.get("last")]
+                else:
+                    e[0] += vol
+                    e[1] += ch
+                    e[2] += 1
 
-        summary = []
-        for sym, entries in aggregate.items():
-            avg_vol = sum((e.get("volume") or 0) for e in entries) / len(entries)
-            last = entries[0].get("last")
-            avg_change = sum((e.get("change_pct") or 0) for e in entries) / len(entries)
-            summary.append({"symbol": sym, "avg_vol": avg_vol, "last": last, "avg_change": avg_change, "ex_count": len(entries)})
+        summary = [
+            {"symbol": sym, "avg_vol": vol / cnt, "last": last, "avg_change": ch / cnt, "ex_count": cnt}
+            for sym, (vol, ch, cnt, last) in agg.items()
+        ]
 
-        movers = sorted(summary, key=lambda x: abs(x["avg_change"] or 0), reverse=True)[:20]
+        movers = heapq.nlargest(20, summary, key=lambda x: abs(x["avg_change"]))
         lines = ["Аналітика — прості числа (без графіків):"]
         for m in movers:
             sym = m["symbol"]
@@ -244,36 +338,84 @@ async def handle_analytics(query):
             vol_str = f"{vol:,.0f}" if vol else "n/a"
             lines.append(f"{sym} — {last} | {ch} | avg vol: {vol_str} | on {m['ex_count']} exch")
 
-        final = "\n".join(lines)
-        if len(final) > 3800:
-            final = final[:3800] + "\n...truncated..."
-        await query.edit_message_text(final)
+        await send_chunked(query, context, lines, "\n")
     except Exception as e:
         logger.exception("handle_analytics error")
         await query.edit_message_text(f"⚠️ Помилка при генерації аналітики: {e}")
-    finally:
-        await close_exchange_clients(clients)
 
 # Новини — читаємо RSS
-async def handle_news(query):
+# Кеш по URL: etag/last_modified для умовних запитів, готові рядки заголовків
+# і час останнього звернення; TTL відсікає повторні запити без мережі взагалі
+RSS_TTL = 60.0
+_RSS_CACHE: Dict[str, Dict[str, Any]] = {}
+
+_ATOM_NS = {"atom": "http://www.w3.org/2005/Atom"}
+
+def _parse_feed_lines(name: str, data: bytes) -> List[str]:
+    # боту потрібні лише title/link/published перших 5 записів — прямий
+    # etree-прохід на порядок дешевший за повний feedparser; сирі байти
+    # йдуть просто в парсер, який сам читає кодування з XML-декларації
+    root = _etree.fromstring(data)
+    entries = root.findall(".//item") or root.findall(".//atom:entry", _ATOM_NS)
+    lines = []
+    for e in entries[:5]:
+        title = e.findtext("title") or e.findtext("atom:title", namespaces=_ATOM_NS) or "No title"
+        link = e.findtext("link") or ""
+        if not link:
+            ln = e.find("atom:link", _ATOM_NS)
+            if ln is not None:
+                link = ln.get("href") or ""
+        published = e.findtext("pubDate") or e.findtext("atom:updated", namespaces=_ATOM_NS) or ""
+        lines.append(f"[{name}] {title.strip()} — {published}\n{link}")
+    return lines
+
+async def fetch_feed(session: aiohttp.ClientSession, name: str, url: str):
+    now = time.monotonic()
+    cached = _RSS_CACHE.get(url)
+    if cached and now - cached["fetched_at"] < RSS_TTL:
+        return cached["lines"]
+
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    try:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=15), headers=headers) as resp:
+            if resp.status == 304 and cached:
+                cached["fetched_at"] = now
+                return cached["lines"]
+            if resp.status != 200:
+                return None
+            data = await resp.read()
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+    except Exception:
+        logger.warning("Failed to fetch RSS %s", url)
+        return None
+
+    # парсинг синхронний — лишаємо його в тред-пулі, щоб не блокувати
+    # event loop, і всі фіди парсяться паралельно
+    try:
+        lines = await asyncio.get_running_loop().run_in_executor(None, _parse_feed_lines, name, data)
+    except Exception:
+        logger.warning("Failed to parse RSS %s", url)
+        return None
+    _RSS_CACHE[url] = {"etag": etag, "last_modified": last_modified, "lines": lines, "fetched_at": now}
+    return lines
+
+async def handle_news(query, context):
     headlines = []
     try:
-        async with aiohttp.ClientSession() as session:
-            for name, url in RSS_FEEDS.items():
-                try:
-                    async with session.get(url, timeout=15) as resp:
-                        if resp.status != 200:
-                            continue
-                        text = await resp.text()
-                        feed = feedparser.parse(text)
-                        for e in feed.entries[:5]:
-                            title = e.get("title", "No title")
-                            link = e.get("link", "")
-                            published = e.get("published", "")
-                            headlines.append(f"[{name}] {title} — {published}\n{link}")
-                except Exception:
-                    logger.warning("Failed to fetch RSS %s", url)
-                    continue
+        session = context.application.bot_data["http"]
+        # всі фіди паралельно — загальний час = найповільніший фід, а не сума
+        tasks = [fetch_feed(session, name, url) for name, url in _RSS_FEED_LIST]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for res in results:
+            if res and not isinstance(res, Exception):
+                headlines.extend(res)
     except Exception as e:
         logger.exception("RSS session error")
 
@@ -281,12 +423,38 @@ async def handle_news(query):
         await query.edit_message_text("Не вдалося отримати новини з RSS.")
         return
 
-    final = "\n\n".join(headlines)[:3800]
-    await query.edit_message_text(final)
+    await send_chunked(query, context, headlines, "\n\n")
 
 # ------- Запуск бота -------
+# Клієнти бірж живуть стільки ж, скільки застосунок: створюються один раз у
+# post_init і закриваються у post_shutdown, без повторних TLS/load_markets
+# на кожне натискання кнопки
+async def post_init(app):
+    app.bot_data["exchanges"] = await create_exchange_clients(EXCHANGES)
+    # одна спільна HTTP-сесія для RSS тощо — теплий пул з'єднань і DNS-кеш
+    app.bot_data["http"] = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=64,
+            limit_per_host=8,
+            ttl_dns_cache=300,
+            enable_cleanup_closed=True,
+        )
+    )
+
+async def post_shutdown(app):
+    await close_exchange_clients(app.bot_data.get("exchanges", {}))
+    http = app.bot_data.get("http")
+    if http is not None:
+        await http.close()
+
 if __name__ == "__main__":
-    app = ApplicationBuilder().token(TELEGRAM_TOKEN).build()
+    app = (
+        ApplicationBuilder()
+        .token(TELEGRAM_TOKEN)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     # додаємо хендлери
     app.add_handler(CommandHandler("start", start))